@@ -3,11 +3,12 @@
 # Daily Rates, Risk Drivers, Managed Services, Clear Explanations
 # ----------------------------
 
+import io
+
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from numba import njit
 
 st.set_page_config(layout="wide", page_title="Agile Monte Carlo Simulator")
 
@@ -96,161 +97,369 @@ n_simulations = st.sidebar.slider("Number of Simulations", 1_000, 10_000, 5_000,
 DAYS_PER_SPRINT = 10  # 2 weeks
 WORK_DAYS_PER_MONTH = 20
 BASE_VELOCITY = 20  # SP per sprint
+TARGET_MARKUP = 1.20  # revenue = 120% of one-off cost
+# Simulations drawn and computed per pass: caps each RNG/kernel call for N above the
+# slider range (at most 10k, so one pass today); antithetic pairs are formed per chunk
+SIM_CHUNK = 1 << 14
+
+# Per-simulation result columns, in the order simulate() writes them
+RESULT_COLUMNS = (
+    'Scope_SP', 'Velocity_SP', 'Sprints', 'Duration_Days', 'Duration_Months',
+    'Labor_Cost', 'Rework_Cost', 'Cloud_Cost', 'Managed_Service_Annual', 'TCO_OneOff',
+    'TCO_Total', 'Revenue', 'Profit', 'Profit_Margin_%',
+)
+# Cost drivers shown in the sensitivity chart (correlation against TCO_Total)
+DRIVER_COLUMNS = (
+    'Scope_SP', 'Velocity_SP', 'Duration_Months', 'Cloud_Cost',
+    'Rework_Cost', 'Labor_Cost', 'TCO_OneOff',
+)
+
+# Summary quantiles per column: stats[col] is [P1, P50, P80, P90, P99]
+# (P1-P99 is also the histogram domain, so bin edges are fixed per run)
+QUANTILES = (0.01, 0.5, 0.8, 0.9, 0.99)
+STAT_COLUMNS = ('Scope_SP', 'Duration_Months', 'TCO_Total', 'Profit', 'Profit_Margin_%')
+
+EXPORT_COLUMNS = [
+    'Duration_Months', 'TCO_OneOff', 'Managed_Service_Annual', 'TCO_Total',
+    'Profit', 'Profit_Margin_%', 'Scope_SP', 'Sprints'
+]
+
+# Result panels: (column, colour, title, x-axis label), laid out row by row in a 2x2 grid
+PLOTS = (
+    ('TCO_Total', 'skyblue', "Total Cost of Ownership (One-Off + Managed Service)", "Cost ($)"),
+    ('Profit', 'lightgreen', "Profit Distribution", "Profit ($)"),
+    ('Duration_Months', 'gold', "Project Duration (Months)", "Months"),
+    ('Profit_Margin_%', 'plum', "Profit Margin (%)", "Margin (%)"),
+)
+HIST_BINS = 50
+KDE_GRID_POINTS = 256
+KDE_MIN_SAMPLES = 1_000  # below this the KDE overlay is skipped
+
+# ----------------------------
+# Simulation Kernel
+# ----------------------------
+@njit(fastmath=True, cache=True)
+def simulate(
+    z_scope, z_velocity, beta_change, beta_rework, e_bugs, u_cloud,
+    base_scope, risk_scope, risk_changes, risk_velocity, risk_bugs,
+    daily_rate, cloud_min, cloud_max, managed_service_pct,
+    out_scope, out_velocity, out_sprints, out_days, out_months,
+    out_labor, out_rework, out_cloud, out_managed, out_tco_one_off,
+    out_tco_total, out_revenue, out_profit, out_margin,
+):
+    """Fused per-simulation cost model; random inputs are pre-drawn standard variates."""
+    vel_std = BASE_VELOCITY * risk_velocity
+    for i in range(z_scope.shape[0]):
+        # --- 1. Final Scope: base + uncertainty + mid-project changes ---
+        scope_volatility = z_scope[i] * risk_scope
+        scope_change = beta_change[i] * risk_changes  # feature creep
+        final_scope = max(100.0, base_scope * (1 + scope_volatility + scope_change))
+
+        # --- 2. Velocity with variability ---
+        velocity = max(5.0, BASE_VELOCITY + vel_std * z_velocity[i])
+
+        # --- 3. Duration ---
+        sprints = final_scope / velocity
+        total_days = sprints * DAYS_PER_SPRINT
+        duration_months = total_days / WORK_DAYS_PER_MONTH
+
+        # --- 4. Labor Cost (team daily rate x days) ---
+        labor_cost = daily_rate * total_days
+
+        # --- 5. Rework Cost ---
+        rework_factor = min(beta_rework[i] + risk_bugs * e_bugs[i], 1.0)
+        rework_cost = rework_factor * labor_cost
+
+        # --- 6. Cloud Cost ---
+        monthly_cloud = cloud_min + (cloud_max - cloud_min) * u_cloud[i]
+        cloud_cost = monthly_cloud * duration_months
+
+        # --- 7. One-Off TCO (Initial Project Cost) ---
+        tco_one_off = labor_cost + rework_cost + cloud_cost
+
+        # --- 8. Managed Service (Annual Ongoing Cost) ---
+        managed_service_annual = managed_service_pct * tco_one_off
+
+        # --- 9. Total Cost of Ownership (Over Project Duration) ---
+        tco_total = tco_one_off + (managed_service_annual * duration_months / 12)
+
+        # --- 10. Revenue & Profit (Auto with 20% target markup on one-off) ---
+        revenue_one_off = tco_one_off * TARGET_MARKUP
+        profit = revenue_one_off - tco_total
+        profit_margin = (profit / revenue_one_off) * 100 if revenue_one_off > 0 else 0.0
+
+        out_scope[i] = final_scope
+        out_velocity[i] = velocity
+        out_sprints[i] = sprints
+        out_days[i] = total_days
+        out_months[i] = duration_months
+        out_labor[i] = labor_cost
+        out_rework[i] = rework_cost
+        out_cloud[i] = cloud_cost
+        out_managed[i] = managed_service_annual
+        out_tco_one_off[i] = tco_one_off
+        out_tco_total[i] = tco_total
+        out_revenue[i] = revenue_one_off
+        out_profit[i] = profit
+        out_margin[i] = profit_margin
+
+
+def antithetic_normal(rng, out):
+    """Fill out in place with standard normals: a fresh half, then its -z mirror."""
+    h = (len(out) + 1) // 2
+    rng.standard_normal(out=out[:h])
+    np.negative(out[:len(out) - h], out=out[h:])
+    return out
+
+
+def antithetic_uniform(rng, out):
+    """Fill out in place with uniforms: a fresh half, then its 1 - u mirror."""
+    h = (len(out) + 1) // 2
+    rng.random(out=out[:h])
+    np.subtract(1.0, out[:len(out) - h], out=out[h:])
+    return out
+
+
+def corr_with(rows, target):
+    """Pearson correlation of each row of a 2-D array with a 1-D target."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((rows - rows.mean(1, keepdims=True)) * (target - target.mean())).sum(1) / (
+            rows.std(1) * target.std() * len(target))
+
 
 # ----------------------------
 # Run Simulation
 # ----------------------------
+@st.cache_data(show_spinner=False, max_entries=4)
+def run_simulation(
+    n_simulations, base_scope, risk_scope, risk_velocity, risk_bugs, risk_changes,
+    num_dev, rate_dev, num_qa, rate_qa, num_pm, rate_pm,
+    cloud_min, cloud_max, managed_service_pct,
+):
+    """Run the Monte Carlo model; cached per combination of sidebar inputs."""
+    from scipy.special import betaincinv  # lazy: only needed once a run is requested
+
+    # One independent stream per random input, so skipping an input's draws below
+    # leaves every other input's samples unchanged (common random numbers across runs)
+    rng_scope, rng_velocity, rng_cloud, rng_bugs, rng_change, rng_rework = (
+        np.random.default_rng(42).spawn(6))
+    # Loop-invariant: the whole team's cost per working day
+    daily_rate = num_dev * rate_dev + num_qa * rate_qa + num_pm * rate_pm
+
+    # --- 0. Preallocated random inputs and results, filled chunk by chunk.
+    # An input whose risk (or cloud range) is zero cannot move the result, so its
+    # draws are skipped entirely and its buffer stays at zero ---
+    z_scope = np.empty(n_simulations) if risk_scope else np.zeros(n_simulations)
+    z_velocity = np.empty(n_simulations) if risk_velocity else np.zeros(n_simulations)
+    u_cloud = np.empty(n_simulations) if cloud_max != cloud_min else np.zeros(n_simulations)
+    e_bugs = np.empty(n_simulations) if risk_bugs else np.zeros(n_simulations)
+    beta_change = np.empty(n_simulations) if risk_changes else np.zeros(n_simulations)
+    beta_rework = np.empty(n_simulations)
+    cols = {name: np.empty(n_simulations) for name in RESULT_COLUMNS}
+
+    # Kernel scalars as float64 whatever the sidebar hands back (ints, or 0 when the
+    # managed service is off), so numba compiles exactly one specialization
+    scalars = tuple(map(float, (
+        base_scope, risk_scope, risk_changes, risk_velocity, risk_bugs,
+        daily_rate, cloud_min, cloud_max, managed_service_pct,
+    )))
+
+    for start in range(0, n_simulations, SIM_CHUNK):
+        chunk = slice(start, min(start + SIM_CHUNK, n_simulations))
+
+        # --- Random inputs: antithetic pairs, z/-z for normals and u/1-u through inverse CDFs,
+        # all transformed in place in the preallocated buffers ---
+        if risk_scope:
+            antithetic_normal(rng_scope, z_scope[chunk])
+        if risk_velocity:
+            antithetic_normal(rng_velocity, z_velocity[chunk])
+        if cloud_max != cloud_min:
+            antithetic_uniform(rng_cloud, u_cloud[chunk])
+        if risk_bugs:
+            e = antithetic_uniform(rng_bugs, e_bugs[chunk])
+            np.negative(np.log1p(np.negative(e, out=e), out=e), out=e)  # Exp(1) = -log(1 - u)
+        if risk_changes:
+            betaincinv(2, 5, antithetic_uniform(rng_change, beta_change[chunk]), out=beta_change[chunk])
+        betaincinv(3, 8, antithetic_uniform(rng_rework, beta_rework[chunk]), out=beta_rework[chunk])
+
+        # --- 1-10. Scope, duration, costs and profit (compiled kernel) ---
+        simulate(
+            z_scope[chunk], z_velocity[chunk], beta_change[chunk], beta_rework[chunk],
+            e_bugs[chunk], u_cloud[chunk],
+            *scalars,
+            *(col[chunk] for col in cols.values()),
+        )
+
+    # --- 11-12. Sensitivity: cost drivers, then each risk slider's own draws, vs TCO.
+    # risk_idx maps a risk name to its row, taken from the same mapping the rows come from ---
+    risk_draws = {'Bugs': e_bugs, 'Scope': z_scope, 'Velocity': z_velocity, 'Changes': beta_change}
+    risk_idx = {name: len(DRIVER_COLUMNS) + i for i, name in enumerate(risk_draws)}
+    corr_vec = corr_with(
+        np.stack([*(cols[c] for c in DRIVER_COLUMNS), *risk_draws.values()]),
+        cols['TCO_Total'])
+
+    # --- 13. Summary Statistics (one quantile pass per column) ---
+    stats = {col: np.quantile(cols[col], QUANTILES) for col in STAT_COLUMNS}
+
+    # --- 14. Histograms on fixed P1-P99 bin edges ---
+    hists = {}
+    for col, *_ in PLOTS:
+        lo, hi = stats[col][0], stats[col][-1]
+        if np.isclose(lo, hi, rtol=1e-9, atol=0):  # constant bar float noise: unit-wide domain
+            lo, hi = lo - 0.5, hi + 0.5
+        edges = np.linspace(lo, hi, HIST_BINS + 1)
+        hists[col] = (np.histogram(cols[col], bins=edges)[0], edges)
+
+    return {
+        'cols': cols,
+        'stats': stats,
+        'hists': hists,
+        'prob_profit': (cols['Profit'] > 0).mean(),
+        'corr_vec': corr_vec,
+        'risk_idx': risk_idx,
+    }
+
+
+def kde_curve(x, edges):
+    """KDE of x over the histogram domain, scaled to bin counts (empty if skipped)."""
+    from scipy.stats import gaussian_kde  # lazy: only needed once results are shown
+
+    if len(x) < KDE_MIN_SAMPLES or np.isclose(x.min(), x.max(), rtol=1e-9, atol=0):
+        return np.empty(0), np.empty(0)
+    grid = np.linspace(edges[0], edges[-1], KDE_GRID_POINTS)
+    return grid, gaussian_kde(x)(grid) * len(x) * (edges[1] - edges[0])
+
+
+def build_figure():
+    """Create the 2x2 results figure with placeholder artists; update_figure() fills them."""
+    from matplotlib.figure import Figure  # lazy, and no pyplot global state across sessions
+
+    fig = Figure(figsize=(14, 10))
+    ax = fig.subplots(2, 2)
+    fig.suptitle("Monte Carlo Simulation Results", fontsize=16, fontweight='bold')
+
+    artists = []
+    for panel, (col, color, title, xlabel) in zip(ax.flat, PLOTS):
+        bars = panel.bar(np.zeros(HIST_BINS), np.zeros(HIST_BINS), align='edge', color=color,
+                         alpha=0.75, edgecolor='white', linewidth=0.5)
+        kde_line, = panel.plot([], [], color=color)
+        median_line = panel.axvline(0, color='red', linestyle='--')
+        panel.set_title(title)
+        panel.set_xlabel(xlabel)
+        panel.set_ylabel("Count")
+        artists.append((panel, bars, kde_line, median_line))
+
+    artists[0][3].set_label("Median")
+    ax[0,0].legend()
+    ax[0,1].axvline(0, color='black', linewidth=1)
+
+    return fig, artists
+
+
+def update_figure(fig, artists, sim):
+    """Point the existing bars, KDE lines and median markers at a new simulation's data."""
+    for (panel, bars, kde_line, median_line), (col, *_) in zip(artists, PLOTS):
+        counts, edges = sim['hists'][col]
+        grid, curve = kde_curve(sim['cols'][col], edges)
+        for rect, left, width, height in zip(bars, edges[:-1], np.diff(edges), counts):
+            rect.set_x(left)
+            rect.set_width(width)
+            rect.set_height(height)
+        kde_line.set_data(grid, curve)
+        median_line.set_xdata([sim['stats'][col][1]] * 2)
+        panel.relim()
+        panel.autoscale_view()
+    fig.tight_layout()
+    fig.canvas.draw_idle()
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def export_csv(**inputs):
+    """Serialize the exported columns to CSV bytes once per combination of sidebar inputs."""
+    cols = run_simulation(**inputs)['cols']
+    buf = io.BytesIO()
+    pd.DataFrame({c: cols[c] for c in EXPORT_COLUMNS}, copy=False).to_csv(
+        buf, index=False, float_format='%.2f')
+    return buf.getvalue()
+
+
+inputs = dict(
+    n_simulations=n_simulations, base_scope=base_scope,
+    risk_scope=risk_scope, risk_velocity=risk_velocity,
+    risk_bugs=risk_bugs, risk_changes=risk_changes,
+    num_dev=num_dev, rate_dev=rate_dev, num_qa=num_qa, rate_qa=rate_qa,
+    num_pm=num_pm, rate_pm=rate_pm,
+    cloud_min=cloud_min, cloud_max=cloud_max, managed_service_pct=managed_service_pct,
+)
+
 if st.sidebar.button("Run Monte Carlo Simulation"):
     with st.spinner("Running simulation..."):
-
-        np.random.seed(42)
-        results = []
-
-        for i in range(n_simulations):
-            # --- 1. Final Scope: base + uncertainty + mid-project changes ---
-            scope_volatility = np.random.normal(0, risk_scope)
-            scope_change = np.random.beta(2, 5) * risk_changes  # feature creep
-            final_scope = base_scope * (1 + scope_volatility + scope_change)
-            final_scope = max(100, final_scope)
-
-            # --- 2. Velocity with variability ---
-            vel_std = BASE_VELOCITY * risk_velocity
-            velocity = max(5, np.random.normal(BASE_VELOCITY, vel_std))
-
-            # --- 3. Duration ---
-            sprints = final_scope / velocity
-            total_days = sprints * DAYS_PER_SPRINT
-            duration_months = total_days / WORK_DAYS_PER_MONTH
-
-            # --- 4. Labor Cost (from daily rates) ---
-            labor_dev = num_dev * rate_dev * total_days
-            labor_qa = num_qa * rate_qa * total_days
-            labor_pm = num_pm * rate_pm * total_days
-            labor_cost = labor_dev + labor_qa + labor_pm
-
-            # --- 5. Rework Cost ---
-            rework_factor = np.random.beta(3, 8) + np.random.exponential(risk_bugs)
-            rework_factor = min(rework_factor, 1.0)
-            rework_cost = rework_factor * labor_cost
-
-            # --- 6. Cloud Cost ---
-            monthly_cloud = np.random.uniform(cloud_min, cloud_max)
-            cloud_cost = monthly_cloud * duration_months
-
-            # --- 7. One-Off TCO (Initial Project Cost) ---
-            tco_one_off = labor_cost + rework_cost + cloud_cost
-
-            # --- 8. Managed Service (Annual Ongoing Cost) ---
-            managed_service_annual = managed_service_pct * tco_one_off if include_managed_service else 0
-
-            # --- 9. Total Cost of Ownership (Over Project Duration) ---
-            tco_total = tco_one_off + (managed_service_annual * duration_months / 12)
-
-            # --- 10. Revenue & Profit (Auto with 20% target markup on one-off) ---
-            target_markup = 1.20
-            revenue_one_off = tco_one_off * target_markup
-            profit = revenue_one_off - tco_total
-            profit_margin = (profit / revenue_one_off) * 100 if revenue_one_off > 0 else 0
-
-            # --- 11. Store Results ---
-            results.append({
-                'Scope_SP': final_scope,
-                'Velocity_SP': velocity,
-                'Sprints': sprints,
-                'Duration_Days': total_days,
-                'Duration_Months': duration_months,
-                'Labor_Cost': labor_cost,
-                'Rework_Cost': rework_cost,
-                'Cloud_Cost': cloud_cost,
-                'Managed_Service_Annual': managed_service_annual,
-                'TCO_OneOff': tco_one_off,
-                'TCO_Total': tco_total,
-                'Revenue': revenue_one_off,
-                'Profit': profit,
-                'Profit_Margin_%': profit_margin,
-                'Risk_Scope': risk_scope,
-                'Risk_Velocity': risk_velocity,
-                'Risk_Bugs': risk_bugs,
-                'Risk_Changes': risk_changes
-            })
-
-        df = pd.DataFrame(results)
-        st.session_state['df'] = df
+        run_simulation(**inputs)
+        st.session_state['inputs'] = inputs
 
 # ----------------------------
 # Display Results
 # ----------------------------
-if 'df' in st.session_state:
-    df = st.session_state['df']
+if 'inputs' in st.session_state:
+    inputs = st.session_state['inputs']
+    sim = run_simulation(**inputs)
+    stats = sim['stats']
 
     st.title("Agile Monte Carlo Simulator")
     st.subheader("Daily Rates • Risk-Driven • Managed Services • Transparent Scope")
 
     # Key Metrics
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Median Scope", f"{df['Scope_SP'].median():.0f} SP")
-    col2.metric("Median Duration", f"{df['Duration_Months'].median():.1f} mo")
-    col3.metric("Median TCO (Total)", f"${df['TCO_Total'].median():,.0f}")
-    col4.metric("Profit Margin", f"{df['Profit_Margin_%'].median():.1f}%")
+    col1.metric("Median Scope", f"{stats['Scope_SP'][1]:.0f} SP")
+    col2.metric("Median Duration", f"{stats['Duration_Months'][1]:.1f} mo")
+    col3.metric("Median TCO (Total)", f"${stats['TCO_Total'][1]:,.0f}")
+    col4.metric("Profit Margin", f"{stats['Profit_Margin_%'][1]:.1f}%")
 
     st.markdown("---")
 
-    # Charts
-    fig, ax = plt.subplots(2, 2, figsize=(14, 10))
-    fig.suptitle("Monte Carlo Simulation Results", fontsize=16, fontweight='bold')
-
-    sns.histplot(df['TCO_Total'], bins=50, kde=True, ax=ax[0,0], color='skyblue')
-    ax[0,0].axvline(df['TCO_Total'].median(), color='red', linestyle='--', label="Median")
-    ax[0,0].legend()
-    ax[0,0].set_title("Total Cost of Ownership (One-Off + Managed Service)")
-    ax[0,0].set_xlabel("Cost ($)")
-
-    sns.histplot(df['Profit'], bins=50, kde=True, ax=ax[0,1], color='lightgreen')
-    ax[0,1].axvline(df['Profit'].median(), color='red', linestyle='--')
-    ax[0,1].axvline(0, color='black', linewidth=1)
-    ax[0,1].set_title("Profit Distribution")
-    ax[0,1].set_xlabel("Profit ($)")
-
-    sns.histplot(df['Duration_Months'], bins=50, kde=True, ax=ax[1,0], color='gold')
-    ax[1,0].axvline(df['Duration_Months'].median(), color='red', linestyle='--')
-    ax[1,0].set_title("Project Duration (Months)")
-    ax[1,0].set_xlabel("Months")
-
-    sns.histplot(df['Profit_Margin_%'], bins=50, kde=True, ax=ax[1,1], color='plum')
-    ax[1,1].axvline(df['Profit_Margin_%'].median(), color='red', linestyle='--')
-    ax[1,1].set_title("Profit Margin (%)")
-    ax[1,1].set_xlabel("Margin (%)")
-
-    plt.tight_layout()
-    st.pyplot(fig)
+    # Charts: one figure per session, redrawn in place only when a different run is shown
+    if 'figure' not in st.session_state:
+        st.session_state['figure'] = build_figure()
+    if st.session_state.get('figure_inputs') != inputs:
+        fig, artists = st.session_state['figure']
+        update_figure(fig, artists, sim)
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+        st.session_state['figure_png'] = buf.getvalue()
+        st.session_state['figure_inputs'] = inputs
+    st.image(st.session_state['figure_png'], width='stretch')
 
     # Risk Summary
     st.markdown("### Risk & Confidence")
     col1, col2, col3 = st.columns(3)
-    col1.write(f"✅ **P80 TCO (Total):** ${df['TCO_Total'].quantile(0.8):,.0f}")
-    col2.write(f"📉 **Chance of Profit:** {(df['Profit'] > 0).mean() * 100:.1f}%")
-    col3.write(f"⏱️ **P90 Duration:** {df['Duration_Months'].quantile(0.9):.1f} months")
+    col1.write(f"✅ **P80 TCO (Total):** ${stats['TCO_Total'][2]:,.0f}")
+    col2.write(f"📉 **Chance of Profit:** {sim['prob_profit'] * 100:.1f}%")
+    col3.write(f"⏱️ **P90 Duration:** {stats['Duration_Months'][3]:.1f} months")
 
     # Sensitivity
     st.markdown("### Sensitivity: Top Cost Drivers")
-    corr = df.corr()['TCO_Total'].sort_values(key=abs, ascending=False)
-    high_corr = corr[abs(corr) > 0.1]
-    st.bar_chart(high_corr)
-
-    top_risks = [k.replace('Risk_', '').replace('_', ' ') for k in ['Risk_Bugs', 'Risk_Scope', 'Risk_Velocity', 'Risk_Changes']
-                 if abs(df.corr()['TCO_Total'][k]) > 0.2]
+    corr_vec = sim['corr_vec']
+    driver_corr = corr_vec[:len(DRIVER_COLUMNS)]
+    order = [i for i in np.argsort(-np.abs(driver_corr)) if abs(driver_corr[i]) > 0.1]
+    st.bar_chart(pd.Series(driver_corr[order], index=[DRIVER_COLUMNS[i] for i in order]))
+
+    risks = {
+        'Scope': inputs['risk_scope'],
+        'Velocity': inputs['risk_velocity'],
+        'Bugs': inputs['risk_bugs'],
+        'Changes': inputs['risk_changes']
+    }
+    top_risks = [
+        name for name, i in sim['risk_idx'].items() if risks[name] > 0 and abs(corr_vec[i]) > 0.2
+    ]
     if top_risks:
-        st.write(f"⚠️ Highest impact risks: **{', '.join([r.title() for r in top_risks])}**")
+        st.write(f"⚠️ Highest impact risks: **{', '.join(top_risks)}**")
 
     # Export
     st.markdown("### Export Results")
-    csv = df[[
-        'Duration_Months', 'TCO_OneOff', 'Managed_Service_Annual', 'TCO_Total',
-        'Profit', 'Profit_Margin_%', 'Scope_SP', 'Sprints'
-    ]].round(2).to_csv(index=False)
     st.download_button(
         "Download Results (CSV)",
-        csv,
+        export_csv(**inputs),
         "agile_monte_carlo_v3.csv",
         "text/csv"
     )